@@ -14,15 +14,193 @@
 # limitations under the License.
 """Functions related to plotting"""
 
-import matplotlib.pyplot as plt
 import numpy as np
 import warnings
-from sklearn.metrics import confusion_matrix
+
+# matplotlib.pyplot module - only imported when first plot is made
+plt = None
+# all styles matplotlib knows about
+_AVAILABLE_STYLES = None
+# sorted styles as text used in error messages
+_STYLE_LIST_REPR = None
+# style that was last set by one of the plot functions
+_LAST_STYLE = None
+# figure and axes kept between `plot_array(reuse_fig=True)` calls
+_CACHED_FIG = {'fig': None, 'ax': None}
+# biggest confusion matrix that gets a separate text artist for each cell
+_TEXT_ARTISTS_MAX_K = 10
+
+
+def _plt():
+    """Import matplotlib.pyplot on first call and reuse it afterwards.
+    Importing pyplot is slow so it is not done when this module is imported.
+    :return: matplotlib.pyplot module.
+    """
+    global plt
+
+    if plt is None:
+        import matplotlib.pyplot as plt
+
+    return plt
+
+
+def _style_list_repr():
+    """Text with all available styles, built only the first time an error message needs it.
+    :return: str sorted list of styles.
+    """
+    global _STYLE_LIST_REPR
+
+    if _STYLE_LIST_REPR is None:
+        _STYLE_LIST_REPR = str(sorted(_AVAILABLE_STYLES))
+
+    return _STYLE_LIST_REPR
+
+
+def _use_style(style_sheet):
+    """Set matplotlib style sheet only if it is different from the one set last time.
+    :param style_sheet: style of plot. Use plt.style.available to show all styles.
+    :return:
+    """
+    global _AVAILABLE_STYLES, _LAST_STYLE
+
+    plt = _plt()
+    if _AVAILABLE_STYLES is None:
+        # find all styles only once
+        _AVAILABLE_STYLES = frozenset(plt.style.available)
+    if style_sheet not in _AVAILABLE_STYLES:
+        # style is not correct
+        raise ValueError("`style_sheet=%s` is not in the supported styles: %s" % (str(style_sheet),
+                                                                                  _style_list_repr()))
+    if style_sheet != _LAST_STYLE:
+        # set style of plot
+        plt.style.use(style_sheet)
+        _LAST_STYLE = style_sheet
+
+    return
+
+
+def _fast_cm(y_true, y_pred, n_labels):
+    """Count confusion matrix of integer labels from [0, n_labels) with a single bincount.
+    :param y_true: np.ndarray integer labels values.
+    :param y_pred: np.ndarray integer predicted label values.
+    :param n_labels: int number of possible labels.
+    :return: np.ndarray confusion matrix of shape [n_labels, n_labels].
+    """
+    # flat index of (true, predicted) cell for each example
+    index = y_true.astype(np.int64) * n_labels + y_pred.astype(np.int64)
+
+    return np.bincount(index, minlength=n_labels * n_labels).reshape(n_labels, n_labels)
+
+
+def _confusion_matrix(y_true, y_pred):
+    """Compute confusion matrix same as `sklearn.metrics.confusion_matrix(y_true, y_pred)`.
+    Integer encoded labels are counted directly with numpy, any other labels use sklearn.
+    :param y_true: array labels values.
+    :param y_pred: array predicted label values.
+    :return: np.ndarray confusion matrix.
+    """
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    if (y_true.size > 0 and y_true.ndim == 1 and y_true.shape == y_pred.shape
+            and y_true.dtype.kind in 'iu' and y_pred.dtype.kind in 'iu'):
+        # smallest and largest label used
+        low = min(y_true.min(), y_pred.min())
+        high = max(y_true.max(), y_pred.max())
+        # matrix has (high + 1)^2 cells - avoid huge matrices when labels are sparse ids
+        n_labels = int(high) + 1
+        if low >= 0 and n_labels * n_labels <= 4 * y_true.size + 1024:
+            cm = _fast_cm(y_true, y_pred, n_labels)
+            # keep only labels that show up in `y_true` or `y_pred` - same as sklearn
+            present = (cm.sum(axis=0) + cm.sum(axis=1)) > 0
+            return cm if present.all() else cm[present][:, present]
+
+    from sklearn.metrics import confusion_matrix
+
+    return confusion_matrix(y_true, y_pred)
+
+
+def _prep_cm(cm, normalize=False, find_colors=True):
+    """Prepare confusion matrix for plotting: normalize rows and find text colors.
+    :param cm: np.ndarray confusion matrix of counts.
+    :param normalize: bool normalize each row to sum up to 1 or not.
+    :param find_colors: bool find text colors or not. Not needed when cells are not annotated.
+    :return: tuple of confusion matrix used to plot and boolean mask of cells that need light colored text
+        (None if `find_colors=False`).
+    """
+    if normalize is True:
+        # multiply each row by inverse of its total count - result is float without an `astype` copy
+        row_inverse = 1. / cm.sum(axis=1, dtype=np.float64)
+        cm = cm * row_inverse[:, np.newaxis]
+    if find_colors is False:
+        return cm, None
+    # cells above half of max value are dark so they need white text
+    color_mask = cm > cm.max() / 2.
+
+    return cm, color_mask
+
+
+def _annotate_cm(ax, texts, color_mask):
+    """Write value of each confusion matrix cell in the center of that cell.
+    Small matrices use a text artist for each cell. Bigger matrices draw the outline of
+    each unique string once and place all of them with a single collection artist.
+    :param ax: matplotlib axes where confusion matrix is plotted.
+    :param texts: np.ndarray formatted value of each cell.
+    :param color_mask: np.ndarray boolean mask of cells that need light colored text.
+    :return:
+    """
+    if max(texts.shape) <= _TEXT_ARTISTS_MAX_K:
+        # loop over data dimensions and create text annotations
+        for (i, j), text in np.ndenumerate(texts):
+            ax.text(j, i, text,
+                    ha="center", va="center",
+                    color="white" if color_mask[i, j] else "black")
+        return
+
+    from matplotlib.collections import PathCollection
+    from matplotlib.textpath import TextPath
+    from matplotlib.transforms import Affine2D
+
+    # text outline of each unique string centered around origin - size is in points
+    glyphs = {}
+    for text in np.unique(texts):
+        path = TextPath((0, 0), text)
+        extents = path.get_extents()
+        glyphs[text] = path.transformed(Affine2D().translate(-(extents.x0 + extents.x1) / 2.,
+                                                             -(extents.y0 + extents.y1) / 2.))
+    # center of each cell in data coordinates
+    rows, columns = np.indices(texts.shape)
+    offsets = np.column_stack([columns.ravel(), rows.ravel()])
+    # white or black for each cell
+    colors = np.where(color_mask.reshape(-1, 1), [1., 1., 1., 1.], [0., 0., 0., 1.])
+    # scale outlines from points to pixels and follow figure dpi when saving
+    transform = Affine2D().scale(1 / 72.) + ax.figure.dpi_scale_trans
+    ax.add_collection(PathCollection([glyphs[text] for text in texts.ravel()], offsets=offsets,
+                                     transOffset=ax.transData, transform=transform,
+                                     facecolors=colors, edgecolors='none'), autolim=False)
+
+    return
+
+
+def _save_figure(fig, path, use_dpi, png_compression):
+    """Save figure to image. PNG images skip the slow default compression.
+    :param fig: matplotlib figure to save.
+    :param path: path where to save the plot as an image.
+    :param use_dpi: quality of image saved from plot.
+    :param png_compression: zlib compression level [0-9] used when saving .png images.
+    :return:
+    """
+    if str(path).lower().endswith('.png'):
+        # plots have large flat colored areas that compress well even on low levels
+        fig.savefig(path, dpi=use_dpi, pil_kwargs={'compress_level': png_compression, 'optimize': False})
+    else:
+        fig.savefig(path, dpi=use_dpi)
+
+    return
 
 
 def plot_array(array, step_size=1, use_label=None, use_title=None, use_xlabel=None, use_ylabel=None,
                style_sheet='ggplot', use_grid=True, width=3, height=1, use_linestyle='-',
-               magnify=1.2, use_dpi=20, path=None, show_plot=True):
+               magnify=1.2, use_dpi=20, path=None, show_plot=True, png_compression=3, reuse_fig=False):
     """Create plot from a single array of values.
     :param magnify:
     :param array: list of values. Can be of type list or np.ndarray.
@@ -39,20 +217,19 @@ def plot_array(array, step_size=1, use_label=None, use_title=None, use_xlabel=No
     :param use_dpi: quality of image saved from plot. 100 is pretty high.
     :param path: path where to save the plot as an image - if set to None no image will be saved.
     :param show_plot: if you want to call `plt.show()`. or not (if you run on a headless server).
+    :param png_compression: zlib compression level [0-9] used when saving .png images. Lower is faster.
+    :param reuse_fig: clear and draw on same figure as previous call with `reuse_fig=True` instead of creating
+        a new figure. Faster when plotting many arrays in a loop.
     :return:
     """
     # check if `array` is correct format
-    if not isinstance(array, list) or isinstance(array, np.ndarray):
+    if not isinstance(array, (list, np.ndarray)):
         # raise value error
-        raise ValueError("`array` needs to be a list of values!")
+        raise ValueError("`array` needs to be a list or np.ndarray of values!")
 
-    if style_sheet in plt.style.available:
-        # set style of plot
-        plt.style.use(style_sheet)
-    else:
-        # style is not correct
-        raise ValueError("`style_sheet=%s` is not in the supported styles: %s" % (str(style_sheet),
-                                                                                  str(plt.style.available)))
+    plt = _plt()
+    # make sure style sheet is correct and set it
+    _use_style(style_sheet)
     # all linestyles
     linestyles = ['-', '--', '-.', ':']
 
@@ -62,33 +239,39 @@ def plot_array(array, step_size=1, use_label=None, use_title=None, use_xlabel=No
         raise ValueError("`linestyle=%s` is not in the styles: %s!" % (str(use_linestyle), str(linestyles)))
 
     # set steps plotted on x-axis - we can use step if 1 unit has different value
-    steps = np.array(range(1, len(array) + 1)) * step_size
-    # single plot figure
-    plt.subplot(1, 2, 1)
+    steps = np.arange(1, len(array) + 1) * step_size
+    # change size depending on height and width variables - plot keeps the size it had as half of a 1x2 grid
+    figsize = plt.rcParams['figure.figsize']
+    figsize = [figsize[0] * width * magnify / 2., figsize[1] * height * magnify]
+    # reuse figure only if it was not closed in the meantime
+    if reuse_fig is True and _CACHED_FIG['fig'] is not None and plt.fignum_exists(_CACHED_FIG['fig'].number):
+        fig, ax = _CACHED_FIG['fig'], _CACHED_FIG['ax']
+        # remove previous plot
+        ax.clear()
+        fig.set_size_inches(figsize)
+    else:
+        # single plot figure
+        fig, ax = plt.subplots(figsize=figsize)
+        if reuse_fig is True:
+            # keep figure for next call
+            _CACHED_FIG.update(fig=fig, ax=ax)
     # plot array as a single line
-    plt.plot(steps, array, linestyle=use_linestyle, label=use_label)
+    ax.plot(steps, array, linestyle=use_linestyle, label=use_label)
     # set title of figure
-    plt.title(use_title)
+    ax.set_title(use_title)
     # set horizontal axis name
-    plt.xlabel(use_xlabel)
+    ax.set_xlabel(use_xlabel)
     # set vertical axis name
-    plt.ylabel(use_ylabel)
+    ax.set_ylabel(use_ylabel)
     # place legend best position
-    plt.legend(loc='best') if use_label is not None else None
+    ax.legend(loc='best') if use_label is not None else None
     # display grid depending on `use_grid`
-    plt.grid(use_grid)
-    # make figure nice
-    plt.tight_layout()
-    # get figure object from plot
-    fig = plt.gcf()
-    # get size of figure
-    figsize = fig.get_size_inches()
-    # change size depending on height and width variables
-    figsize = [figsize[0] * width * magnify, figsize[1] * height * magnify]
-    # set the new figure size
-    fig.set_size_inches(figsize)
+    ax.grid(use_grid)
+    # make figure nice - only needed when there is text around plot
+    if any(value is not None for value in (use_title, use_xlabel, use_ylabel, use_label)):
+        fig.tight_layout()
     # save figure to image if path is set
-    fig.savefig(path, dpi=use_dpi) if path is not None else None
+    _save_figure(fig, path, use_dpi, png_compression) if path is not None else None
     # show plot
     plt.show() if show_plot is True else None
 
@@ -97,7 +280,7 @@ def plot_array(array, step_size=1, use_label=None, use_title=None, use_xlabel=No
 
 def plot_dict(dict_arrays, step_size=1, use_title=None, use_xlabel=None, use_ylabel=None,
               style_sheet='ggplot', use_grid=True, width=3, height=1, use_linestyles=None, magnify=1.2,
-              use_dpi=20, path=None, show_plot=True):
+              use_dpi=20, path=None, show_plot=True, png_compression=3):
     """Create plot from a single array of values.
     :param magnify:
     :param dict_arrays:
@@ -113,6 +296,7 @@ def plot_dict(dict_arrays, step_size=1, use_title=None, use_xlabel=None, use_yla
     :param use_dpi: quality of image saved from plot. 100 is pretty high.
     :param path: path where to save the plot as an image - if set to None no image will be saved.
     :param show_plot: if you want to call `plt.show()`. or not (if you run on a headless server).
+    :param png_compression: zlib compression level [0-9] used when saving .png images. Lower is faster.
     :return:
     """
     # check if `dict_arrays` is correct format
@@ -124,59 +308,78 @@ def plot_dict(dict_arrays, step_size=1, use_title=None, use_xlabel=None, use_yla
         if not isinstance(label, str):
             # raise value error
             raise ValueError("`dict_arrays` needs string keys!")
-        if not isinstance(array, list) or isinstance(array, np.ndarray):
+        if not isinstance(array, (list, np.ndarray)):
             # raise value error
-            raise ValueError("`dict_arrays` needs lists values!")
-    # make sure style sheet is correct
-    if style_sheet in plt.style.available:
-        # set style of plot
-        plt.style.use(style_sheet)
-    else:
-        # style is not correct
-        raise ValueError("`style_sheet=%s` is not in the supported styles: %s" % (str(style_sheet),
-                                                                                  str(plt.style.available)))
+            raise ValueError("`dict_arrays` needs list or np.ndarray values!")
+    plt = _plt()
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+
+    # make sure style sheet is correct and set it
+    _use_style(style_sheet)
     # all linestyles
     linestyles = ['-', '--', '-.', ':']
 
     if use_linestyles is None:
         use_linestyles = ['-'] * len(dict_arrays)
 
-    else:
-        # check if linestyle is set right
-        for use_linestyle in use_linestyles:
-            if use_linestyle not in linestyles:
-                # raise error
-                raise ValueError("`linestyle=%s` is not in the styles: %s!" % (str(use_linestyle), str(linestyles)))
+    elif not set(use_linestyles).issubset(linestyles):
+        # only report linestyles that are wrong
+        invalid = [use_linestyle for use_linestyle in use_linestyles if use_linestyle not in linestyles]
+        # raise error
+        raise ValueError("`linestyle=%s` is not in the styles: %s!" % (str(invalid), str(linestyles)))
+
+    elif len(use_linestyles) < len(dict_arrays):
+        # need a linestyle for each array - extra linestyles are ignored
+        raise ValueError("`use_linestyles` needs one linestyle for each array in `dict_arrays`!")
 
+    # change size depending on height and width variables - plot keeps the size it had as half of a 1x2 grid
+    figsize = plt.rcParams['figure.figsize']
+    figsize = [figsize[0] * width * magnify / 2., figsize[1] * height * magnify]
     # single plot figure
-    plt.subplot(1, 2, 1)
-    for index, (use_label, array) in enumerate(dict_arrays.items()):
-        # set steps plotted on x-axis - we can use step if 1 unit has different value
-        steps = np.array(range(1, len(array) + 1)) * step_size
-        # plot array as a single line
-        plt.plot(steps, array, linestyle=use_linestyles[index], label=use_label)
+    fig, ax = plt.subplots(figsize=figsize)
+    # use same colors as consecutive `plt.plot` calls would
+    colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    colors = [colors[index % len(colors)] for index in range(len(dict_arrays))]
+    # all numeric lines as (x, y) segments with their color and linestyle
+    segments, segment_colors, segment_linestyles = [], [], []
+    # legend entries for each line
+    handles = []
+    # steps are reused between arrays of same length
+    steps = None
+    for (use_label, array), color, use_linestyle in zip(dict_arrays.items(), colors, use_linestyles):
+        if steps is None or len(steps) != len(array):
+            # set steps plotted on x-axis - we can use step if 1 unit has different value
+            steps = np.arange(1, len(array) + 1) * step_size
+        values = np.asarray(array)
+        if values.dtype.kind in 'biuf' and values.ndim == 1:
+            segments.append(np.column_stack([steps, values]))
+            segment_colors.append(color)
+            segment_linestyles.append(use_linestyle)
+        else:
+            # categorical, date or multi dimensional values need matplotlib to plot them
+            ax.plot(steps, array, color=color, linestyle=use_linestyle)
+        handles.append(Line2D([], [], color=color, linestyle=use_linestyle, label=use_label))
+    if segments:
+        # plot all numeric arrays as a single collection of lines
+        ax.add_collection(LineCollection(segments, colors=segment_colors, linestyles=segment_linestyles))
+        # fit axis limits to the lines
+        ax.autoscale_view()
     # set title of figure
-    plt.title(use_title)
+    ax.set_title(use_title)
     # set horizontal axis name
-    plt.xlabel(use_xlabel)
+    ax.set_xlabel(use_xlabel)
     # set vertical axis name
-    plt.ylabel(use_ylabel)
+    ax.set_ylabel(use_ylabel)
     # place legend best position
-    plt.legend(loc='best')
+    ax.legend(handles=handles, loc='best')
     # display grid depending on `use_grid`
-    plt.grid(use_grid)
-    # make figure nice
-    plt.tight_layout()
-    # get figure object from plot
-    fig = plt.gcf()
-    # get size of figure
-    figsize = fig.get_size_inches()
-    # change size depending on height and width variables
-    figsize = [figsize[0] * width * magnify, figsize[1] * height * magnify]
-    # set the new figure size with magnify
-    fig.set_size_inches(figsize)
+    ax.grid(use_grid)
+    # make figure nice - only needed when there is text around plot
+    if any(value is not None for value in (use_title, use_xlabel, use_ylabel)):
+        fig.tight_layout()
     # save figure to image if path is set
-    fig.savefig(path, dpi=use_dpi) if path is not None else None
+    _save_figure(fig, path, use_dpi, png_compression) if path is not None else None
     # show plot
     plt.show() if show_plot is True else None
 
@@ -184,8 +387,8 @@ def plot_dict(dict_arrays, step_size=1, use_title=None, use_xlabel=None, use_yla
 
 
 def plot_confusion_matrix(y_true, y_pred, title=None, use_title=None, classes='', normalize=False, style_sheet='ggplot',
-                          cmap=plt.cm.Blues, width=3, height=1, image=None, path=None,
-                          verbose=0, magnify=1, dpi=None, use_dpi=50):
+                          cmap='Blues', width=3, height=1, image=None, path=None,
+                          verbose=0, magnify=1, dpi=None, use_dpi=50, png_compression=3, annotate_max_k=30):
     """This function prints and plots the confusion matrix.
     Normalization can be applied by setting `normalize=True`.
     y_true needs to contain all possible labels.
@@ -199,16 +402,20 @@ def plot_confusion_matrix(y_true, y_pred, title=None, use_title=None, classes=''
     :param classes: array list of label names.
     :param normalize: bool normalize confusion matrix or not.
     :param use_title: str string title of plot.
-    :param cmap: plt.cm plot theme
+    :param cmap: plt.cm plot theme or its name.
     :param image: str path to save plot in an image.
     :param verbose: int print confusion matrix when calling function.
     :param magnify: int zoom of plot.
     :param dpi: int clarity of plot.
     :param style_sheet: style of plot. Use plt.style.available to show all styles.
+    :param png_compression: int zlib compression level [0-9] used when saving .png images. Lower is faster.
+    :param annotate_max_k: int most labels for which values are written in each cell. Bigger matrices are
+        drawn as a mesh without text and values can only be read from colorbar. This keeps plots with
+        hundreds or thousands of labels fast and readable.
     :return: array confusion matrix used to plot.
     Note:
         - Plot themes:
-        cmap=plt.cm.Blues - used as default.
+        cmap='Blues' - used as default.
         cmap=plt.cm.BuPu
         cmap=plt.cm.GnBu
         cmap=plt.cm.Greens
@@ -228,38 +435,50 @@ def plot_confusion_matrix(y_true, y_pred, title=None, use_title=None, classes=''
         use_dpi = dpi
         warnings.warn("`dpi` will be deprecated in future updates. Use `use_dpi` in stead!", DeprecationWarning)
     # Make sure labels have right format
-    if len(y_true) != len(y_pred):
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    if y_true.size != y_pred.size:
         # make sure lengths match
         raise ValueError("`y_true` needs to have same length as `y_pred`!")
-    # make sure style sheet is correct
-    if style_sheet in plt.style.available:
-        # set style of plot
-        plt.style.use(style_sheet)
-    else:
-        # style is not correct
-        raise ValueError("`style_sheet=%s` is not in the supported styles: %s" % (str(style_sheet),
-                                                                                  str(plt.style.available)))
+    plt = _plt()
+    # make sure style sheet is correct and set it
+    _use_style(style_sheet)
+    # Compute confusion matrix
+    cm = _confusion_matrix(y_true, y_pred)
     # Class labels setup. If none, generate from y_true y_pred
     classes = list(classes)
     if classes:
-        assert len(set(y_true)) == len(classes)
+        # matrix has a row for each label
+        if len(classes) != cm.shape[0]:
+            raise ValueError("`classes` needs to have a name for each of the %d labels!" % cm.shape[0])
     else:
-        classes = set(y_true)
-    # Compute confusion matrix
-    cm = confusion_matrix(y_true, y_pred)
+        classes = np.union1d(y_true, y_pred)
+    # Only smaller matrices get values written in cells.
+    annotate = cm.shape[0] <= annotate_max_k
+    # Normalize and find text colors
+    cm, color_mask = _prep_cm(cm, normalize=normalize, find_colors=annotate)
     # Normalize setup
     if normalize is True:
         print("Normalized confusion matrix")
-        cm = cm.astype('float') / cm.sum(axis=1)[:, np.newaxis]
         use_title = 'Normalized confusion matrix' if use_title is None else use_title
     else:
         print('Confusion matrix, without normalization')
         use_title = 'Confusion matrix, without normalization' if use_title is None else use_title
     # Print if verbose
     print(cm) if verbose > 0 else None
+    # Figure size depending on height, width and magnify
+    figsize = plt.rcParams['figure.figsize']
+    figsize = [figsize[0] * width * magnify, figsize[1] * height * magnify]
     # Plot setup
-    fig, ax = plt.subplots()
-    im = ax.imshow(cm, interpolation='nearest', cmap=cmap)
+    fig, ax = plt.subplots(figsize=figsize)
+    if annotate:
+        im = ax.imshow(cm, interpolation='nearest', cmap=cmap)
+    else:
+        # mesh is faster than image for large grids
+        im = ax.pcolormesh(cm, cmap=cmap, shading='nearest')
+        # keep same orientation and square cells as image
+        ax.invert_yaxis()
+        ax.set_aspect('equal')
     ax.figure.colorbar(im, ax=ax)
     # We want to show all ticks...
     ax.set(xticks=np.arange(cm.shape[1]),
@@ -270,30 +489,21 @@ def plot_confusion_matrix(y_true, y_pred, title=None, use_title=None, classes=''
            ylabel='True label',
            xlabel='Predicted label')
     # Rotate the tick labels and set their alignment.
-    plt.setp(ax.get_xticklabels(), rotation=45, ha="right",
-             rotation_mode="anchor")
-    plt.grid(False)
-    # Loop over data dimensions and create text annotations.
-    fmt = '.2f' if normalize else 'd'
-    thresh = cm.max() / 2.
-    for i in range(cm.shape[0]):
-        for j in range(cm.shape[1]):
-            ax.text(j, i, format(cm[i, j], fmt),
-                    ha="center", va="center",
-                    color="white" if cm[i, j] > thresh else "black")
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment("right")
+        label.set_rotation_mode("anchor")
+    ax.grid(False)
+    if annotate:
+        # Format all cell values in one go.
+        texts = np.char.mod('%.2f' if normalize else '%d', cm)
+        # Create text annotations.
+        _annotate_cm(ax, texts, color_mask)
     # Never display grid.
-    plt.grid(False)
+    ax.grid(False)
     # make figure nice
-    plt.tight_layout()
-    # get figure object from plot
-    fig = plt.gcf()
-    # get size of figure
-    figsize = fig.get_size_inches()
-    # change size depending on height and width variables
-    figsize = [figsize[0] * width * magnify, figsize[1] * height * magnify]
-    # set the new figure size with magnify
-    fig.set_size_inches(figsize)
+    fig.tight_layout()
     # save figure to image if path is set
-    fig.savefig(path, dpi=use_dpi) if path is not None else None
+    _save_figure(fig, path, use_dpi, png_compression) if path is not None else None
 
     return cm